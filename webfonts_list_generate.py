@@ -5,14 +5,20 @@ import gzip
 import httplib
 import StringIO
 import re
+from multiprocessing.pool import ThreadPool
 
 __version__ = 1
 USER_AGENT = 'dAlist/%s +http://dt.deviantart.com' % __version__
 GOOGLE = 'http://www.google.com'
 WEBFONTS = 'https://googlefontdirectory.googlecode.com/hg/'
+FETCH_THREADS = 8
+FETCH_TIMEOUT = 30
 
 CACHE = {}
 
+FAMILY_RE = re.compile(r'<li><a href="([^"]+/)"')
+MD5SUM_RE = re.compile("^([^:]+):([^,]+),", re.MULTILINE)
+
 def _fetch(url, data = None, cached = True, ungzip = True):
     """A generic URL-fetcher, which handles gzipped content, returns a string"""
     if cached and url in CACHE:
@@ -21,7 +27,7 @@ def _fetch(url, data = None, cached = True, ungzip = True):
     request.add_header('Accept-encoding', 'gzip')
     request.add_header('User-agent', USER_AGENT)
     #print url
-    f = urllib2.urlopen(request, data)
+    f = urllib2.urlopen(request, data, timeout=FETCH_TIMEOUT)
     data = f.read()
     if ungzip and f.headers.get('content-encoding', '') == 'gzip':
         data = gzip.GzipFile(fileobj=StringIO(data)).read()
@@ -37,11 +43,12 @@ def get_font_data(url):
         return
     
     font_data = {}
-    for f in re.findall("^([^:]+):([^,]+),", info, re.MULTILINE):
+    for f in MD5SUM_RE.findall(info):
         if f[0] not in font_data:
             font_data[f[0]] = []
-        value = f[1].replace(':', '').replace('normal', '')
-        font_data[f[0]].append(value or 'normal')
+        value = f[1].replace(':', '').replace('normal', '') or 'normal'
+        if value not in font_data[f[0]]:
+            font_data[f[0]].append(value)
     
     return font_data
 
@@ -49,18 +56,28 @@ if __name__ == "__main__":
     page = _fetch(WEBFONTS)
     # fetched the listing of a mercurial repo...
     
-    families = re.findall(r'<li><a href="([^"]+/)"', page)
+    families = FAMILY_RE.findall(page)
+
+    # one md5sum fetch per family, so overlap the round-trips. map_async with a
+    # get() timeout rather than map, which can't be interrupted by Ctrl-C on 2.x
+    pool = ThreadPool(FETCH_THREADS)
+    results = pool.map_async(get_font_data, [WEBFONTS + family_url for family_url in families]).get(3600)
+    pool.close()
+    pool.join()
 
-    font_data = []
-    for family_url in families:
-        #print 'fetching', family_url
-        data = get_font_data(WEBFONTS + family_url)
+    # some families show up in more than one directory; merge them so the
+    # output doesn't repeat a key
+    fonts = {}
+    for family_url, data in zip(families, results):
         #print data
         if not data:
             # print "Couldn't find data from", family_url
             continue
         
-        font_data.extend(data.items())
+        for family, variants in data.items():
+            known = fonts.setdefault(family, [])
+            known.extend(v for v in variants if v not in known)
+    font_data = fonts.items()
     #print "%d fonts found" % len(font_data)
     
     # I could just do this with map if I didn't want nice linebreaks. ;_;